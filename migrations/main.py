@@ -3,7 +3,12 @@ import psycopg2
 from psycopg2.extras import execute_values
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
+import urllib.request
+import urllib.error
+import threading
 import argparse
+import queue
+import json
 import time
 
 # =======================
@@ -26,6 +31,15 @@ RANGE_SIZE = 100_000
 BATCH_SIZE = 10_000   
 WORKERS = 10
 
+# SEARCH INDEX (optional second sink for tracks, enabled with --solr)
+SOLR_URL = "http://localhost:8983/solr/tracks"
+SOLR_SENDERS = 4                 # Concurrent HTTP senders
+SOLR_QUEUE_SIZE = WORKERS * 2    # Max batches buffered before ETL workers block
+SOLR_MAX_RETRIES = 5
+SOLR_RETRY_BACKOFF = 1.0         # Seconds, doubled per attempt
+SOLR_TIMEOUT = 120
+SOLR_COMMIT_WITHIN_MS = 60_000
+
 # =======================
 # DATABASE CONNECTIONS
 # =======================
@@ -68,8 +82,8 @@ def init_checkpoints():
     pconn.commit()
     pconn.close()
 
-def get_pending_ranges(table_name, row_min, row_max):
-    """Generate all ranges and filter out the ones already completed."""
+def get_completed_ranges(table_name):
+    """Return the set of (start, end) ranges already marked done for a table."""
     pconn, pcur = pg_conn()
     
     # Get completed chunks
@@ -81,19 +95,37 @@ def get_pending_ranges(table_name, row_min, row_max):
     
     completed = set((r[0], r[1]) for r in pcur.fetchall())
     pconn.close()
-    
-    # Generate all theoretical ranges
-    all_ranges = []
+    return completed
+
+def split_ranges(row_min, row_max):
+    """Split [row_min, row_max] into inclusive RANGE_SIZE chunks."""
+    ranges = []
     curr = row_min
     while curr <= row_max:
         end = min(curr + RANGE_SIZE - 1, row_max)
-        all_ranges.append((curr, end))
+        ranges.append((curr, end))
         curr += RANGE_SIZE
+    return ranges
+
+def get_pending_ranges(sinks, row_min, row_max):
+    """
+    Generate all ranges and map each one to the sinks that still need it.
+    Every sink keeps its own checkpoints, so a range done in Postgres is
+    only re-extracted for the sinks that are behind.
+    """
+    completed = {sink: get_completed_ranges(sink.checkpoint_name) for sink in sinks}
+    
+    # Generate all theoretical ranges
+    all_ranges = split_ranges(row_min, row_max)
             
     # Filter list
-    pending = [r for r in all_ranges if r not in completed]
+    pending = {}
+    for rng in all_ranges:
+        behind = [sink for sink in sinks if rng not in completed[sink]]
+        if behind:
+            pending[rng] = behind
     
-    return pending, len(completed), len(all_ranges)
+    return pending, len(all_ranges) - len(pending), len(all_ranges)
 
 def mark_range_done(table_name, rng):
     """Mark a specific range as complete in Postgres."""
@@ -163,162 +195,369 @@ def recreate_indexes():
     print("✅ All indexes recreated\n")
 
 # =======================
-# ETL PROCESSORS
+# QUERIES
 # =======================
-def process_tracks_range(rng):
-    start, end = rng
-    sconn, scur = sqlite_conn()
-    pconn, pcur = pg_conn()
-    processed = 0
-    
-    try:
-        # CTE Optimization: Filter tracks FIRST, then join. This prevents full table scans.
-        QUERY = """
-        WITH batch_tracks AS (
-            SELECT rowid, id, name, duration_ms, preview_url, popularity, album_rowid
-            FROM tracks
-            WHERE rowid BETWEEN ? AND ?
+TRACKS_QUERY = """
+WITH batch_tracks AS (
+    SELECT rowid, id, name, duration_ms, preview_url, popularity, album_rowid
+    FROM tracks
+    WHERE rowid BETWEEN ? AND ?
+)
+SELECT
+    t.id AS track_id,
+    t.name AS title,
+    REPLACE(GROUP_CONCAT(DISTINCT a.name), ',', ', ') AS artists,
+    REPLACE(GROUP_CONCAT(DISTINCT g.genre), ',', ', ') AS genres,
+    t.duration_ms,
+    t.preview_url,
+    t.popularity,
+    (
+        SELECT url FROM album_images 
+        WHERE album_rowid = t.album_rowid AND width = 64 
+        LIMIT 1
+    ) AS image_small,
+    (
+        SELECT url FROM album_images 
+        WHERE album_rowid = t.album_rowid AND width >= 500 
+        ORDER BY width ASC LIMIT 1
+    ) AS image_large
+FROM batch_tracks t
+LEFT JOIN track_artists ta ON ta.track_rowid = t.rowid
+LEFT JOIN artists a ON a.rowid = ta.artist_rowid
+LEFT JOIN artist_genres g ON g.artist_rowid = a.rowid
+GROUP BY t.id
+"""
+
+TRACKS_INSERT_SQL = """
+INSERT INTO tracks (
+    track_id, title, artists, genres, duration_ms, 
+    image_small, image_large, preview_url, popularity
+) VALUES %s
+ON CONFLICT (track_id) DO NOTHING
+"""
+
+ARTISTS_QUERY = """
+SELECT
+    a.id AS artist_id, a.name,
+    (SELECT url FROM artist_images WHERE artist_rowid = a.rowid AND width = 64 LIMIT 1) AS image_small,
+    (SELECT url FROM artist_images WHERE artist_rowid = a.rowid AND width >= 500 ORDER BY width ASC LIMIT 1) AS image_large
+FROM artists a WHERE a.rowid BETWEEN ? AND ?
+"""
+
+ARTISTS_INSERT_SQL = """
+INSERT INTO artists (artist_id, name, image_small, image_large) VALUES %s
+ON CONFLICT (artist_id) DO NOTHING
+"""
+
+TRACK_ARTISTS_QUERY = """
+SELECT t.id, a.id 
+FROM track_artists ta
+JOIN tracks t ON t.rowid = ta.track_rowid
+JOIN artists a ON a.rowid = ta.artist_rowid
+WHERE ta.rowid BETWEEN ? AND ?
+"""
+
+TRACK_ARTISTS_INSERT_SQL = "INSERT INTO track_artists (track_id, artist_id) VALUES %s ON CONFLICT DO NOTHING"
+
+# =======================
+# EXTRACTORS
+# =======================
+# Each extractor runs the SQLite query for one rowid range and yields rows
+# already shaped for the Postgres INSERT. Shared by the direct ETL and the
+# snapshot stage (snapshot.py) so both produce identical rows.
+def extract_tracks(scur, rng):
+    # CTE Optimization: Filter tracks FIRST, then join. This prevents full table scans.
+    scur.execute(TRACKS_QUERY, rng)
+    for r in scur:
+        yield (
+            r["track_id"], r["title"], r["artists"] or "", r["genres"] or "",
+            r["duration_ms"], r["image_small"], r["image_large"],
+            r["preview_url"], r["popularity"]
         )
-        SELECT
-            t.id AS track_id,
-            t.name AS title,
-            REPLACE(GROUP_CONCAT(DISTINCT a.name), ',', ', ') AS artists,
-            REPLACE(GROUP_CONCAT(DISTINCT g.genre), ',', ', ') AS genres,
-            t.duration_ms,
-            t.preview_url,
-            t.popularity,
-            (
-                SELECT url FROM album_images 
-                WHERE album_rowid = t.album_rowid AND width = 64 
-                LIMIT 1
-            ) AS image_small,
-            (
-                SELECT url FROM album_images 
-                WHERE album_rowid = t.album_rowid AND width >= 500 
-                ORDER BY width ASC LIMIT 1
-            ) AS image_large
-        FROM batch_tracks t
-        LEFT JOIN track_artists ta ON ta.track_rowid = t.rowid
-        LEFT JOIN artists a ON a.rowid = ta.artist_rowid
-        LEFT JOIN artist_genres g ON g.artist_rowid = a.rowid
-        GROUP BY t.id
-        """
-
-        INSERT_SQL = """
-        INSERT INTO tracks (
-            track_id, title, artists, genres, duration_ms, 
-            image_small, image_large, preview_url, popularity
-        ) VALUES %s
-        ON CONFLICT (track_id) DO NOTHING
-        """
-
-        scur.execute(QUERY, (start, end))
-        
-        rows = []
-        for r in scur:
-            rows.append((
-                r["track_id"], r["title"], r["artists"] or "", r["genres"] or "",
-                r["duration_ms"], r["image_small"], r["image_large"],
-                r["preview_url"], r["popularity"]
-            ))
 
-            if len(rows) >= BATCH_SIZE:
-                execute_values(pcur, INSERT_SQL, rows)
-                pconn.commit()
-                processed += len(rows)
-                rows.clear()
+def extract_artists(scur, rng):
+    scur.execute(ARTISTS_QUERY, rng)
+    for r in scur:
+        yield (r["artist_id"], r["name"], r["image_small"], r["image_large"])
+
+def extract_track_artists(scur, rng):
+    scur.execute(TRACK_ARTISTS_QUERY, rng)
+    for r in scur:
+        yield (r[0], r[1])
 
-        if rows:
-            execute_values(pcur, INSERT_SQL, rows)
+def insert_batched(pconn, pcur, insert_sql, rows_iter):
+    """Insert rows in BATCH_SIZE chunks, committing after each. Returns the row count."""
+    processed = 0
+    rows = []
+    for row in rows_iter:
+        rows.append(row)
+        if len(rows) >= BATCH_SIZE:
+            execute_values(pcur, insert_sql, rows)
             pconn.commit()
             processed += len(rows)
-            
-        # Success! Mark checkpoint
-        mark_range_done("tracks", rng)
+            rows.clear()
+
+    if rows:
+        execute_values(pcur, insert_sql, rows)
+        pconn.commit()
+        processed += len(rows)
 
-    except Exception as e:
-        tqdm.write(f"❌ Tracks range {start}-{end}: {e}")
-        pconn.rollback()
-    finally:
-        sconn.close(); pconn.close()
-    
     return processed
 
-def process_artists_range(rng):
+# =======================
+# SINKS
+# =======================
+# A sink receives the transformed rows of a range in BATCH_SIZE chunks:
+#   begin_range(rng) -> state, write(state, rows), finish_range(state),
+#   abort_range(state), close()
+# finish_range raises if the range did not fully land; otherwise the range
+# is checkpointed under sink.checkpoint_name.
+class PostgresSink:
+    """Inserts rows into a Postgres table, one connection per range."""
+
+    def __init__(self, table_name, insert_sql):
+        self.checkpoint_name = table_name
+        self.insert_sql = insert_sql
+
+    def __repr__(self):
+        return f"postgres:{self.checkpoint_name}"
+
+    def begin_range(self, rng):
+        return pg_conn()
+
+    def write(self, state, rows):
+        pconn, pcur = state
+        execute_values(pcur, self.insert_sql, rows)
+        pconn.commit()
+
+    def finish_range(self, state):
+        state[0].close()
+
+    def abort_range(self, state):
+        pconn, _ = state
+        pconn.rollback()
+        pconn.close()
+
+    def close(self):
+        pass
+
+class SolrRange:
+    """In-flight batch count and first error for one range sent to Solr."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pending = 0
+        self.error = None
+
+class SolrSink:
+    """
+    Streams rows as JSON batches to a Solr-compatible /update endpoint.
+    write() only enqueues; SOLR_SENDERS threads POST in the background while
+    the ETL worker moves on to Postgres. The queue is bounded, so a slow index
+    blocks the workers instead of growing memory.
+    """
+
+    def __init__(self, table_name, url, to_doc):
+        self.checkpoint_name = f"solr:{table_name}"
+        self.update_url = url.rstrip("/") + "/update"
+        self.to_doc = to_doc
+        self.queue = queue.Queue(maxsize=SOLR_QUEUE_SIZE)
+        self.senders = [threading.Thread(target=self._send_loop, daemon=True) for _ in range(SOLR_SENDERS)]
+        for t in self.senders:
+            t.start()
+
+    def __repr__(self):
+        return self.checkpoint_name
+
+    def begin_range(self, rng):
+        return SolrRange()
+
+    def write(self, state, rows):
+        with state.cond:
+            if state.error:
+                raise state.error
+            state.pending += 1
+        self.queue.put(([self.to_doc(r) for r in rows], state))
+
+    def finish_range(self, state):
+        # Only checkpoint once every batch of the range is acknowledged
+        with state.cond:
+            state.cond.wait_for(lambda: state.pending == 0)
+            if state.error:
+                raise state.error
+
+    def abort_range(self, state):
+        # Batches already queued still go out; updates are idempotent by id
+        pass
+
+    def close(self):
+        for _ in self.senders:
+            self.queue.put(None)
+        for t in self.senders:
+            t.join()
+        # Batches already carry commitWithin; a failed final commit must not
+        # abort the rest of the pipeline (remaining tables, index rebuild).
+        try:
+            self._post({"commit": {}})
+        except Exception as e:
+            tqdm.write(f"⚠️ {self!r} final commit failed: {e}")
+
+    def _send_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            docs, state = item
+            error = None
+            try:
+                if state.error is None:
+                    self._post(docs, f"?commitWithin={SOLR_COMMIT_WITHIN_MS}")
+            except Exception as e:
+                error = e
+            with state.cond:
+                state.error = state.error or error
+                state.pending -= 1
+                state.cond.notify_all()
+
+    def _post(self, payload, query=""):
+        body = json.dumps(payload).encode("utf-8")
+        last_error = None
+        for attempt in range(SOLR_MAX_RETRIES):
+            if attempt:
+                time.sleep(SOLR_RETRY_BACKOFF * 2 ** (attempt - 1))
+            req = urllib.request.Request(
+                self.update_url + query, data=body,
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            try:
+                with urllib.request.urlopen(req, timeout=SOLR_TIMEOUT) as resp:
+                    resp.read()
+                return
+            except urllib.error.HTTPError as e:
+                # Other 4xx means a bad request/document; retrying won't fix it
+                if e.code < 500 and e.code != 429:
+                    raise RuntimeError(f"solr error {e.code}: {e.read()[:500].decode('utf-8', 'replace')}")
+                last_error = e
+            except (urllib.error.URLError, OSError) as e:
+                last_error = e
+        raise RuntimeError(f"solr update failed after {SOLR_MAX_RETRIES} attempts: {last_error}")
+
+def track_solr_doc(row):
+    track_id, title, artists, genres, _, _, _, _, popularity = row
+    doc = {"id": track_id, "track_id": track_id, "title": title, "artists": artists, "genres": genres}
+    if popularity is not None:
+        doc["popularity"] = popularity
+    return doc
+
+# =======================
+# ETL PROCESSORS
+# =======================
+def drop_failed_sink(sink, state, rng, error):
+    """Report a sink failure and release its range state; the range stays unmarked for it."""
     start, end = rng
-    sconn, scur = sqlite_conn()
-    pconn, pcur = pg_conn()
-    processed = 0
+    tqdm.write(f"❌ {sink!r} range {start}-{end}: {error}")
     try:
-        QUERY = """
-        SELECT
-            a.id AS artist_id, a.name,
-            (SELECT url FROM artist_images WHERE artist_rowid = a.rowid AND width = 64 LIMIT 1) AS image_small,
-            (SELECT url FROM artist_images WHERE artist_rowid = a.rowid AND width >= 500 ORDER BY width ASC LIMIT 1) AS image_large
-        FROM artists a WHERE a.rowid BETWEEN ? AND ?
-        """
-        INSERT_SQL = """
-        INSERT INTO artists (artist_id, name, image_small, image_large) VALUES %s
-        ON CONFLICT (artist_id) DO NOTHING
-        """
-        scur.execute(QUERY, (start, end))
-        rows = []
-        for r in scur:
-            rows.append((r["artist_id"], r["name"], r["image_small"], r["image_large"]))
-            if len(rows) >= BATCH_SIZE:
-                execute_values(pcur, INSERT_SQL, rows); pconn.commit(); processed += len(rows); rows.clear()
-        if rows: execute_values(pcur, INSERT_SQL, rows); pconn.commit(); processed += len(rows)
-        
-        mark_range_done("artists", rng)
+        sink.abort_range(state)
     except Exception as e:
-        tqdm.write(f"❌ Artists range {start}-{end}: {e}"); pconn.rollback()
-    finally:
-        sconn.close(); pconn.close()
-    return processed
+        tqdm.write(f"⚠️ {sink!r} abort failed: {e}")
 
-def process_track_artists_range(rng):
+def write_to_sinks(opened, rows, rng):
+    """Write a batch to every open sink. Returns the sinks that are still healthy."""
+    healthy = []
+    for sink, state in opened:
+        try:
+            sink.write(state, rows)
+            healthy.append((sink, state))
+        except Exception as e:
+            drop_failed_sink(sink, state, rng, e)
+    return healthy
+
+def process_range(table_name, extract_func, sinks, rng):
+    """
+    Run the SQLite extraction for one range once and fan every batch out to all sinks.
+    Sinks fail independently: a failing sink is dropped for the rest of the range
+    and left unmarked, while the others finish and get checkpointed.
+    """
     start, end = rng
-    sconn, scur = sqlite_conn()
-    pconn, pcur = pg_conn()
+    opened = []
     processed = 0
+
+    for sink in sinks:
+        try:
+            opened.append((sink, sink.begin_range(rng)))
+        except Exception as e:
+            tqdm.write(f"❌ {sink!r} range {start}-{end}: {e}")
+
+    # Don't run the SQLite join when nothing can take the rows
+    if not opened:
+        return 0
+
+    sconn, scur = sqlite_conn()
     try:
-        QUERY = """
-        SELECT t.id, a.id 
-        FROM track_artists ta
-        JOIN tracks t ON t.rowid = ta.track_rowid
-        JOIN artists a ON a.rowid = ta.artist_rowid
-        WHERE ta.rowid BETWEEN ? AND ?
-        """
-        INSERT_SQL = "INSERT INTO track_artists (track_id, artist_id) VALUES %s ON CONFLICT DO NOTHING"
-        
-        scur.execute(QUERY, (start, end))
         rows = []
-        for r in scur:
-            rows.append((r[0], r[1]))
+        for row in extract_func(scur, rng):
+            rows.append(row)
             if len(rows) >= BATCH_SIZE:
-                execute_values(pcur, INSERT_SQL, rows); pconn.commit(); processed += len(rows); rows.clear()
-        if rows: execute_values(pcur, INSERT_SQL, rows); pconn.commit(); processed += len(rows)
-        
-        mark_range_done("track_artists", rng)
+                opened = write_to_sinks(opened, rows, rng)
+                processed += len(rows)
+                rows.clear()
+                if not opened:
+                    break
+
+        if rows and opened:
+            opened = write_to_sinks(opened, rows, rng)
+            processed += len(rows)
+
     except Exception as e:
-        tqdm.write(f"❌ Relation range {start}-{end}: {e}"); pconn.rollback()
+        # Extraction itself failed, so no sink got the whole range
+        tqdm.write(f"❌ {table_name} range {start}-{end}: {e}")
+        for sink, state in opened:
+            drop_failed_sink(sink, state, rng, e)
+        return processed
     finally:
-        sconn.close(); pconn.close()
+        sconn.close()
+
+    # Success! Mark checkpoint per sink, so one failing sink doesn't redo the others
+    for sink, state in opened:
+        try:
+            sink.finish_range(state)
+        except Exception as e:
+            drop_failed_sink(sink, state, rng, e)
+            continue
+        mark_range_done(sink.checkpoint_name, rng)
+
     return processed
 
+def process_tracks_range(rng, sinks=None):
+    return process_range("tracks", extract_tracks, sinks or [PostgresSink("tracks", TRACKS_INSERT_SQL)], rng)
+
+def process_artists_range(rng, sinks=None):
+    return process_range("artists", extract_artists, sinks or [PostgresSink("artists", ARTISTS_INSERT_SQL)], rng)
+
+def process_track_artists_range(rng, sinks=None):
+    return process_range(
+        "track_artists", extract_track_artists,
+        sinks or [PostgresSink("track_artists", TRACK_ARTISTS_INSERT_SQL)], rng
+    )
+
 # =======================
 # CORE RUNNER
 # =======================
-def run_etl_for_table(table_name, process_func, count_query, range_query, start_at=None):
+def sqlite_table_stats(count_query, range_query):
+    """Return (row_count, min_rowid, max_rowid) for a SQLite table."""
+    sconn, scur = sqlite_conn()
+    scur.execute(count_query); total_count = scur.fetchone()[0]
+    scur.execute(range_query); row_min, row_max = scur.fetchone()
+    sconn.close()
+    return total_count, row_min, row_max
+
+def run_etl_for_table(table_name, process_func, sinks, count_query, range_query, start_at=None):
     print(f"\n{'='*60}")
     print(f"📀 Starting ETL for: {table_name}")
     print(f"{'='*60}\n")
     
     # 1. Get Metadata
-    sconn, scur = sqlite_conn()
-    scur.execute(count_query); total_count = scur.fetchone()[0]
-    scur.execute(range_query); row_min, row_max = scur.fetchone()
-    sconn.close()
+    total_count, row_min, row_max = sqlite_table_stats(count_query, range_query)
     
     if row_min is None or total_count == 0:
         print(f"❌ No {table_name} found in SQLite.")
@@ -330,7 +569,7 @@ def run_etl_for_table(table_name, process_func, count_query, range_query, start_
         row_min = start_at
     
     # 2. Get Pending Ranges
-    pending_ranges, done_count, total_chunks = get_pending_ranges(table_name, row_min, row_max)
+    pending_ranges, done_count, total_chunks = get_pending_ranges(sinks, row_min, row_max)
     
     if not pending_ranges:
         print(f"✅ {table_name} - All valid chunks already completed! Skipping.")
@@ -346,8 +585,13 @@ def run_etl_for_table(table_name, process_func, count_query, range_query, start_
     print(f"📦 Progress Cache: {done_count} chunks already done")
     print(f"🎯 Pending Work: {len(pending_ranges)} chunks")
     print(f"👷 Workers: {WORKERS} | Batch: {BATCH_SIZE:,}")
+    print(f"🪣 Sinks: {', '.join(map(repr, sinks))}")
     print("-" * 60)
     
+    return run_ranges(table_name, lambda rng: process_func(rng, pending_ranges[rng]), list(pending_ranges))
+
+def run_ranges(table_name, process_func, pending_ranges):
+    """Fan pending ranges out over the worker pool with a progress bar."""
     total_processed = 0
     start_time = time.time()
     
@@ -376,7 +620,7 @@ def run_etl_for_table(table_name, process_func, count_query, range_query, start_
     print(f"\n✅ {table_name} batch done! ({elapsed/60:.1f}m)")
     return total_processed
 
-def run_bulk_etl(skip_artists=False, skip_tracks=False, skip_relations=False, start_at=None):
+def run_bulk_etl(skip_artists=False, skip_tracks=False, skip_relations=False, start_at=None, solr_url=None):
     print("\n🚀 INITIALIZING ETL PIPELINE")
     init_checkpoints()
     drop_heavy_indexes()
@@ -385,16 +629,23 @@ def run_bulk_etl(skip_artists=False, skip_tracks=False, skip_relations=False, st
     current_start_at = start_at
 
     if not skip_tracks:
-        run_etl_for_table(
-            "tracks", process_tracks_range,
-            "SELECT COUNT(*) FROM tracks", "SELECT MIN(rowid), MAX(rowid) FROM tracks",
-            start_at=current_start_at
-        )
+        sinks = [PostgresSink("tracks", TRACKS_INSERT_SQL)]
+        if solr_url:
+            sinks.append(SolrSink("tracks", solr_url, track_solr_doc))
+        try:
+            run_etl_for_table(
+                "tracks", process_tracks_range, sinks,
+                "SELECT COUNT(*) FROM tracks", "SELECT MIN(rowid), MAX(rowid) FROM tracks",
+                start_at=current_start_at
+            )
+        finally:
+            for sink in sinks:
+                sink.close()
         current_start_at = None # Consumed for subequent tables
     
     if not skip_artists:
         run_etl_for_table(
-            "artists", process_artists_range,
+            "artists", process_artists_range, [PostgresSink("artists", ARTISTS_INSERT_SQL)],
             "SELECT COUNT(*) FROM artists", "SELECT MIN(rowid), MAX(rowid) FROM artists",
             start_at=current_start_at
         )
@@ -403,6 +654,7 @@ def run_bulk_etl(skip_artists=False, skip_tracks=False, skip_relations=False, st
     if not skip_relations:
         run_etl_for_table(
             "track_artists", process_track_artists_range,
+            [PostgresSink("track_artists", TRACK_ARTISTS_INSERT_SQL)],
             "SELECT COUNT(*) FROM track_artists", "SELECT MIN(rowid), MAX(rowid) FROM track_artists",
             start_at=current_start_at
         )
@@ -422,8 +674,13 @@ def main():
     parser.add_argument("--skip-relations", action="store_true", help="Skip relations table")
     parser.add_argument("--recreate-indexes", action="store_true", help="Force index rebuild")
     parser.add_argument("--start-at", type=int, help="Force start from a specific rowid for the first table")
+    parser.add_argument("--solr", action="store_true", help="Also stream tracks to the Solr index (own checkpoints; needs --bulk or --tracks-only, not --skip-tracks)")
+    parser.add_argument("--solr-url", default=SOLR_URL, help="Solr core/collection URL for --solr")
     
     args = parser.parse_args()
+
+    if args.solr and (args.skip_tracks or args.recreate_indexes or not (args.bulk or args.tracks_only)):
+        parser.error("--solr only applies to the tracks pass: use it with --bulk or --tracks-only, without --skip-tracks")
     
     # Initialize DB table for checkpoints first
     init_checkpoints()
@@ -435,7 +692,8 @@ def main():
             skip_artists=args.skip_artists or args.tracks_only,
             skip_tracks=args.skip_tracks,
             skip_relations=args.skip_relations or args.tracks_only,
-            start_at=args.start_at
+            start_at=args.start_at,
+            solr_url=args.solr_url if args.solr else None
         )
     else:
         print("Usage: python main.py --bulk --start-at 100000000")
@@ -0,0 +1,366 @@
+"""
+Columnar snapshot stage for the Spotify ETL.
+
+  extract: SQLite -> transformed rows -> zstd Parquet partitions (one per rowid range)
+  load:    Parquet partitions (memory-mapped, in parallel) -> Postgres
+
+The extract stage runs the expensive SQLite joins once. Reloads, schema
+experiments and loads into another environment then only need --load.
+"""
+import os
+import json
+import argparse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+import main as etl
+from main import (
+    BATCH_SIZE, WORKERS,
+    sqlite_conn, pg_conn,
+    init_checkpoints, get_completed_ranges, mark_range_done, split_ranges,
+    drop_heavy_indexes, recreate_indexes,
+    sqlite_table_stats, run_ranges, insert_batched,
+    extract_tracks, extract_artists, extract_track_artists,
+    TRACKS_INSERT_SQL, ARTISTS_INSERT_SQL, TRACK_ARTISTS_INSERT_SQL,
+)
+
+# =======================
+# CONFIGURATION
+# =======================
+SNAPSHOT_DIR = "/data/Spotify/snapshot"
+COMPRESSION = "zstd"
+
+# Column order must match the tuples yielded by the extractors in main.py
+TABLES = {
+    "tracks": dict(
+        extract=extract_tracks,
+        insert_sql=TRACKS_INSERT_SQL,
+        count_query="SELECT COUNT(*) FROM tracks",
+        range_query="SELECT MIN(rowid), MAX(rowid) FROM tracks",
+        schema=pa.schema([
+            ("track_id", pa.string()),
+            ("title", pa.string()),
+            ("artists", pa.string()),
+            ("genres", pa.string()),
+            ("duration_ms", pa.int64()),
+            ("image_small", pa.string()),
+            ("image_large", pa.string()),
+            ("preview_url", pa.string()),
+            ("popularity", pa.int32()),
+        ]),
+    ),
+    "artists": dict(
+        extract=extract_artists,
+        insert_sql=ARTISTS_INSERT_SQL,
+        count_query="SELECT COUNT(*) FROM artists",
+        range_query="SELECT MIN(rowid), MAX(rowid) FROM artists",
+        schema=pa.schema([
+            ("artist_id", pa.string()),
+            ("name", pa.string()),
+            ("image_small", pa.string()),
+            ("image_large", pa.string()),
+        ]),
+    ),
+    "track_artists": dict(
+        extract=extract_track_artists,
+        insert_sql=TRACK_ARTISTS_INSERT_SQL,
+        count_query="SELECT COUNT(*) FROM track_artists",
+        range_query="SELECT MIN(rowid), MAX(rowid) FROM track_artists",
+        schema=pa.schema([
+            ("track_id", pa.string()),
+            ("artist_id", pa.string()),
+        ]),
+    ),
+}
+
+# =======================
+# PARTITION LAYOUT
+# =======================
+# <SNAPSHOT_DIR>/<table>/manifest.json
+# <SNAPSHOT_DIR>/<table>/part-<start>-<end>.parquet
+# A partition only appears once fully written (tmp file + rename), so its
+# existence doubles as the extract checkpoint. The manifest pins down what
+# produced the partitions, so stale or misaligned ones are never reused.
+def manifest_path(table_name):
+    return os.path.join(SNAPSHOT_DIR, table_name, "manifest.json")
+
+def source_fingerprint():
+    """Identify the SQLite source by path, size and mtime."""
+    st = os.stat(etl.SQLITE_DB)
+    return {
+        "sqlite_db": os.path.abspath(etl.SQLITE_DB),
+        "sqlite_size": st.st_size,
+        "sqlite_mtime_ns": st.st_mtime_ns,
+    }
+
+def build_manifest(row_min, row_max, start_at=None):
+    return {
+        **source_fingerprint(),
+        "range_size": etl.RANGE_SIZE,
+        "row_min": row_min,
+        "row_max": row_max,
+        "start_at": start_at,
+    }
+
+def read_manifest(table_name):
+    path = manifest_path(table_name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(table_name, manifest):
+    path = manifest_path(table_name)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def manifest_mismatch(manifest, check_source=True):
+    """Return a description of why the on-disk snapshot can't be used, or None."""
+    if manifest.get("range_size") != etl.RANGE_SIZE:
+        return f"RANGE_SIZE is {etl.RANGE_SIZE:,} but snapshot used {manifest.get('range_size')}"
+    if check_source:
+        current = source_fingerprint()
+        changed = [k for k, v in current.items() if manifest.get(k) != v]
+        if changed:
+            return f"SQLite source changed since extract ({', '.join(changed)})"
+    return None
+
+def partition_path(table_name, rng):
+    start, end = rng
+    return os.path.join(SNAPSHOT_DIR, table_name, f"part-{start:012d}-{end:012d}.parquet")
+
+def list_partitions(table_name):
+    """Return the sorted (start, end) ranges that have a complete partition on disk."""
+    table_dir = os.path.join(SNAPSHOT_DIR, table_name)
+    if not os.path.isdir(table_dir):
+        return []
+
+    ranges = []
+    for name in os.listdir(table_dir):
+        if not (name.startswith("part-") and name.endswith(".parquet")):
+            continue
+        start, end = name[len("part-"):-len(".parquet")].split("-")
+        ranges.append((int(start), int(end)))
+    return sorted(ranges)
+
+def rows_to_batch(rows, schema):
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+# =======================
+# EXTRACT STAGE
+# =======================
+def snapshot_range(table_name, rng):
+    spec = TABLES[table_name]
+    schema = spec["schema"]
+    start, end = rng
+    path = partition_path(table_name, rng)
+    tmp_path = path + ".tmp"
+    sconn, scur = sqlite_conn()
+    processed = 0
+
+    try:
+        with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION) as writer:
+            rows = []
+            for row in spec["extract"](scur, rng):
+                rows.append(row)
+                if len(rows) >= BATCH_SIZE:
+                    writer.write_batch(rows_to_batch(rows, schema))
+                    processed += len(rows)
+                    rows.clear()
+
+            # Empty ranges still get a partition so they count as extracted
+            if rows or processed == 0:
+                writer.write_batch(rows_to_batch(rows, schema))
+                processed += len(rows)
+
+        os.replace(tmp_path, path)
+    except Exception as e:
+        tqdm.write(f"❌ Snapshot {table_name} range {start}-{end}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    finally:
+        sconn.close()
+
+    return processed
+
+def run_snapshot_for_table(table_name, start_at=None):
+    spec = TABLES[table_name]
+    print(f"\n{'='*60}")
+    print(f"🧊 Snapshotting: {table_name} -> {os.path.join(SNAPSHOT_DIR, table_name)}")
+    print(f"{'='*60}\n")
+
+    total_count, row_min, row_max = sqlite_table_stats(spec["count_query"], spec["range_query"])
+
+    if row_min is None or total_count == 0:
+        print(f"❌ No {table_name} found in SQLite.")
+        return 0
+
+    if start_at is not None and start_at > row_min:
+        print(f"⏩ Overriding start rowid to: {start_at:,}")
+        row_min = start_at
+
+    os.makedirs(os.path.join(SNAPSHOT_DIR, table_name), exist_ok=True)
+    expected = build_manifest(row_min, row_max, start_at)
+    manifest = read_manifest(table_name)
+
+    if manifest is None and list_partitions(table_name):
+        print(f"❌ {table_name} has partitions but no manifest. Remove them or use another --snapshot-dir.")
+        return 0
+    if manifest is not None and manifest != expected:
+        print(f"❌ {table_name} snapshot was produced from a different source or range layout. "
+              f"Remove it or use another --snapshot-dir.")
+        return 0
+    write_manifest(table_name, expected)
+
+    all_ranges = split_ranges(row_min, row_max)
+    pending_ranges = [r for r in all_ranges if not os.path.exists(partition_path(table_name, r))]
+
+    if not pending_ranges:
+        print(f"✅ {table_name} - Snapshot already complete! Skipping.")
+        return 0
+
+    print(f"📊 Total DB Rows: {total_count:,}")
+    print(f"📦 Partitions on disk: {len(all_ranges) - len(pending_ranges)}")
+    print(f"🎯 Pending Work: {len(pending_ranges)} chunks")
+    print(f"👷 Workers: {WORKERS} | Batch: {BATCH_SIZE:,} | Compression: {COMPRESSION}")
+    print("-" * 60)
+
+    return run_ranges(table_name, lambda rng: snapshot_range(table_name, rng), pending_ranges)
+
+# =======================
+# LOAD STAGE
+# =======================
+def load_range(table_name, rng):
+    spec = TABLES[table_name]
+    start, end = rng
+    pconn, pcur = pg_conn()
+    processed = 0
+
+    try:
+        # Stream one batch at a time so each worker holds a single decompressed batch
+        with pq.ParquetFile(partition_path(table_name, rng), memory_map=True) as parquet:
+            rows = (
+                row
+                for batch in parquet.iter_batches(batch_size=BATCH_SIZE)
+                for row in zip(*(col.to_pylist() for col in batch.columns))
+            )
+            processed = insert_batched(pconn, pcur, spec["insert_sql"], rows)
+
+        # Same checkpoint keys as a direct ETL run with the same RANGE_SIZE and
+        # --start-at (both pinned in the manifest), so either path can resume the other
+        mark_range_done(table_name, rng)
+    except Exception as e:
+        tqdm.write(f"❌ Load {table_name} range {start}-{end}: {e}")
+        pconn.rollback()
+    finally:
+        pconn.close()
+
+    return processed
+
+def run_load_for_table(table_name):
+    print(f"\n{'='*60}")
+    print(f"📥 Loading snapshot: {table_name}")
+    print(f"{'='*60}\n")
+
+    partitions = list_partitions(table_name)
+    manifest = read_manifest(table_name)
+    if not partitions or manifest is None:
+        print(f"❌ No {table_name} snapshot in {SNAPSHOT_DIR}. Run --extract first.")
+        return 0
+
+    # The source is only checked when it is reachable; loading into another
+    # environment from a copied snapshot is the point of this stage.
+    mismatch = manifest_mismatch(manifest, check_source=os.path.exists(etl.SQLITE_DB))
+    if mismatch:
+        print(f"❌ Refusing to load {table_name}: {mismatch}")
+        return 0
+    expected_ranges = split_ranges(manifest["row_min"], manifest["row_max"])
+    if partitions != expected_ranges:
+        print(f"❌ Refusing to load {table_name}: snapshot is incomplete "
+              f"({len(partitions)}/{len(expected_ranges)} partitions). Finish --extract first.")
+        return 0
+
+    completed = get_completed_ranges(table_name)
+    pending_ranges = [r for r in partitions if r not in completed]
+
+    if not pending_ranges:
+        print(f"✅ {table_name} - All partitions already loaded! Skipping.")
+        return 0
+
+    print(f"📦 Partitions: {len(partitions)} ({len(partitions) - len(pending_ranges)} already loaded)")
+    print(f"🎯 Pending Work: {len(pending_ranges)} chunks")
+    print(f"👷 Workers: {WORKERS} | Batch: {BATCH_SIZE:,}")
+    print("-" * 60)
+
+    return run_ranges(table_name, lambda rng: load_range(table_name, rng), pending_ranges)
+
+def selected_tables(skip_artists=False, skip_tracks=False, skip_relations=False):
+    tables = []
+    if not skip_tracks: tables.append("tracks")
+    if not skip_artists: tables.append("artists")
+    if not skip_relations: tables.append("track_artists")
+    return tables
+
+def run_snapshot(tables, start_at=None):
+    print("\n🧊 EXTRACTING SNAPSHOT")
+    # Apply start_at to the FIRST selected table, then consume it.
+    current_start_at = start_at
+    for table_name in tables:
+        run_snapshot_for_table(table_name, start_at=current_start_at)
+        current_start_at = None
+    print("\n🎉 SNAPSHOT COMPLETE!")
+
+def run_load(tables):
+    print("\n📥 LOADING SNAPSHOT INTO POSTGRES")
+    init_checkpoints()
+    drop_heavy_indexes()
+    for table_name in tables:
+        run_load_for_table(table_name)
+    recreate_indexes()
+    print("\n🎉 LOAD COMPLETE!")
+
+# =======================
+# MAIN
+# =======================
+def main():
+    global SNAPSHOT_DIR
+
+    parser = argparse.ArgumentParser(description="Spotify ETL: Columnar Snapshot")
+    parser.add_argument("--extract", action="store_true", help="Extract SQLite into Parquet partitions (auto-resumes)")
+    parser.add_argument("--load", action="store_true", help="Load Parquet partitions into Postgres (auto-resumes)")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="Directory holding the partitions")
+    parser.add_argument("--tracks-only", action="store_true", help="Only the tracks table")
+    parser.add_argument("--skip-artists", action="store_true", help="Skip artists table")
+    parser.add_argument("--skip-tracks", action="store_true", help="Skip tracks table")
+    parser.add_argument("--skip-relations", action="store_true", help="Skip relations table")
+    parser.add_argument("--start-at", type=int, help="Force extract start from a specific rowid for the first table")
+
+    args = parser.parse_args()
+    SNAPSHOT_DIR = args.snapshot_dir
+
+    tables = selected_tables(
+        skip_artists=args.skip_artists or args.tracks_only,
+        skip_tracks=args.skip_tracks,
+        skip_relations=args.skip_relations or args.tracks_only,
+    )
+
+    if not (args.extract or args.load):
+        print("Usage: python snapshot.py --extract            # SQLite -> Parquet")
+        print("       python snapshot.py --load               # Parquet -> Postgres")
+        print("       python snapshot.py --extract --load     # both, back to back")
+        return
+
+    if args.extract:
+        run_snapshot(tables, start_at=args.start_at)
+    if args.load:
+        run_load(tables)
+
+if __name__ == "__main__":
+    main()
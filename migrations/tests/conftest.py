@@ -0,0 +1,42 @@
+import os
+import sys
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Tiny Spotify-shaped SQLite source with 25 tracks at rowids 1-25."""
+    path = tmp_path / "source.sqlite3"
+    c = sqlite3.connect(path)
+    c.executescript("""
+        CREATE TABLE tracks (id, name, duration_ms, preview_url, popularity, album_rowid);
+        CREATE TABLE artists (id, name);
+        CREATE TABLE track_artists (track_rowid, artist_rowid);
+        CREATE TABLE artist_genres (artist_rowid, genre);
+        CREATE TABLE album_images (album_rowid, width, url);
+        CREATE TABLE artist_images (artist_rowid, width, url);
+    """)
+    for i in range(1, 26):
+        # Odd tracks have no album art and no popularity
+        c.execute(
+            "INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?)",
+            (f"t{i}", f"Song {i}", 1000 * i, None, None if i % 2 else i, 1 if i % 2 == 0 else 2),
+        )
+    c.execute("INSERT INTO artists VALUES ('a1', 'Artist One')")
+    c.execute("INSERT INTO track_artists VALUES (1, 1)")
+    c.execute("INSERT INTO artist_genres VALUES (1, 'rock')")
+    c.execute("INSERT INTO album_images VALUES (1, 64, 'small.jpg')")
+    c.execute("INSERT INTO album_images VALUES (1, 640, 'large.jpg')")
+    c.commit()
+    c.close()
+
+    # Imported here so a missing ETL dependency skips the test modules instead of breaking collection
+    import main
+    monkeypatch.setattr(main, "SQLITE_DB", str(path))
+    monkeypatch.setattr(main, "RANGE_SIZE", 10)
+    monkeypatch.setattr(main, "BATCH_SIZE", 4)
+    return path
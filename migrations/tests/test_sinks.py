@@ -0,0 +1,271 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("tqdm")
+
+import main
+
+
+class StandInSolr:
+    """Local HTTP stand-in for a Solr core's /update endpoint."""
+
+    def __init__(self):
+        self.requests = []    # (path, payload) for every POST received
+        self.docs = {}
+        self.responses = []   # Scripted status codes, popped per request; 200 when empty
+        self.reject_ids = set()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.rejected = threading.Event()
+        self.lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stand_in.gate.wait()
+                with stand_in.lock:
+                    stand_in.requests.append((self.path, payload))
+                    status = stand_in.responses.pop(0) if stand_in.responses else 200
+                    if isinstance(payload, list) and any(d["id"] in stand_in.reject_ids for d in payload):
+                        status = 400
+                    if status == 200 and isinstance(payload, list):
+                        for doc in payload:
+                            stand_in.docs[doc["id"]] = doc
+                self.send_response(status)
+                self.end_headers()
+                self.wfile.write(b"{}")
+                if status == 400:
+                    stand_in.rejected.set()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/solr/tracks"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def batch_requests(self):
+        return [p for _, p in self.requests if isinstance(p, list)]
+
+    def stop(self):
+        self.gate.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RecordingSink:
+    """Postgres stand-in with the sink interface."""
+
+    def __init__(self, checkpoint_name="tracks", on_write=None, on_begin=None):
+        self.checkpoint_name = checkpoint_name
+        self.on_write = on_write
+        self.on_begin = on_begin
+        self.rows = []
+        self.aborted = False
+
+    def begin_range(self, rng):
+        if self.on_begin:
+            self.on_begin()
+        return None
+
+    def write(self, state, rows):
+        self.rows.extend(rows)
+        if self.on_write:
+            self.on_write()
+
+    def finish_range(self, state):
+        pass
+
+    def abort_range(self, state):
+        self.aborted = True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def solr(monkeypatch):
+    monkeypatch.setattr(main, "SOLR_RETRY_BACKOFF", 0.001)
+    monkeypatch.setattr(main, "SOLR_TIMEOUT", 5)
+    stand_in = StandInSolr()
+    yield stand_in
+    stand_in.stop()
+
+
+@pytest.fixture
+def checkpoints(monkeypatch):
+    marked = []
+    monkeypatch.setattr(main, "mark_range_done", lambda name, rng: marked.append((name, rng)))
+    return marked
+
+
+def track_row(i):
+    return (f"t{i}", f"Song {i}", "Artist", "rock", 1000, None, None, None, i)
+
+
+def test_retries_503_and_429(solr):
+    solr.responses = [503, 429]
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    state = sink.begin_range((1, 2))
+    sink.write(state, [track_row(1), track_row(2)])
+    sink.finish_range(state)
+    sink.close()
+
+    assert len(solr.batch_requests()) == 3
+    assert set(solr.docs) == {"t1", "t2"}
+    assert solr.docs["t1"]["track_id"] == "t1"
+    assert solr.requests[0][0].startswith("/solr/tracks/update?commitWithin=")
+    assert solr.requests[-1][1] == {"commit": {}}
+
+
+def test_gives_up_after_max_retries(solr, monkeypatch):
+    monkeypatch.setattr(main, "SOLR_MAX_RETRIES", 3)
+    solr.responses = [503] * 3
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    state = sink.begin_range((1, 1))
+    sink.write(state, [track_row(1)])
+    with pytest.raises(RuntimeError, match="after 3 attempts"):
+        sink.finish_range(state)
+    sink.close()
+
+    assert len(solr.batch_requests()) == 3
+
+
+def test_no_retry_on_other_4xx(solr):
+    solr.responses = [400]
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    state = sink.begin_range((1, 1))
+    sink.write(state, [track_row(1)])
+    with pytest.raises(RuntimeError, match="solr error 400"):
+        sink.finish_range(state)
+    sink.close()
+
+    assert len(solr.batch_requests()) == 1
+    assert solr.docs == {}
+
+
+def test_finish_range_waits_for_every_batch(solr):
+    solr.gate.clear()
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    state = sink.begin_range((1, 6))
+    for i in range(1, 7, 2):
+        sink.write(state, [track_row(i), track_row(i + 1)])
+
+    finished = threading.Event()
+    waiter = threading.Thread(target=lambda: (sink.finish_range(state), finished.set()))
+    waiter.start()
+    assert not finished.wait(0.2)
+
+    solr.gate.set()
+    assert finished.wait(5)
+    waiter.join()
+    sink.close()
+
+    assert len(solr.docs) == 6
+
+
+def test_close_reports_unreachable_commit(monkeypatch):
+    monkeypatch.setattr(main, "SOLR_RETRY_BACKOFF", 0.001)
+    monkeypatch.setattr(main, "SOLR_MAX_RETRIES", 2)
+    monkeypatch.setattr(main, "SOLR_TIMEOUT", 1)
+    sink = main.SolrSink("tracks", "http://127.0.0.1:9/solr/tracks", main.track_solr_doc)
+    sink.close()  # Must not raise
+
+
+def test_failing_solr_does_not_block_postgres(solr, sqlite_db, checkpoints, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_SIZE", 2)
+    solr.reject_ids = {"t1"}
+
+    def wait_for_rejection():
+        # Let the Solr failure land mid-range, before the next batch is written
+        assert solr.rejected.wait(5)
+        time.sleep(0.05)
+
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+    pg = RecordingSink(on_write=wait_for_rejection)
+
+    processed = main.process_tracks_range((1, 10), [sink, pg])
+    sink.close()
+
+    assert processed == 10
+    assert sorted(r[0] for r in pg.rows) == sorted(f"t{i}" for i in range(1, 11))
+    assert not pg.aborted
+    assert checkpoints == [("tracks", (1, 10))]
+    assert len(solr.batch_requests()) == 1  # Solr dropped after its first failure
+
+
+def test_both_sinks_checkpoint_independently(solr, sqlite_db, checkpoints):
+    pg = RecordingSink()
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    main.process_tracks_range((1, 10), [pg, sink])
+    sink.close()
+
+    assert sorted(checkpoints) == [("solr:tracks", (1, 10)), ("tracks", (1, 10))]
+    assert len(solr.docs) == 10
+    assert len(solr.batch_requests()) == 3  # BATCH_SIZE=4
+
+
+def test_pending_ranges_are_per_sink(monkeypatch, sqlite_db):
+    completed = {"tracks": {(1, 10), (11, 20)}, "solr:tracks": {(1, 10)}}
+    monkeypatch.setattr(main, "get_completed_ranges", lambda name: set(completed.get(name, set())))
+    pg = RecordingSink()
+    solr = RecordingSink("solr:tracks")
+
+    pending, done_count, total_chunks = main.get_pending_ranges([pg, solr], 1, 25)
+
+    assert pending == {(11, 20): [solr], (21, 25): [pg, solr]}
+    assert (done_count, total_chunks) == (1, 3)
+
+
+def postgres_down():
+    raise RuntimeError("connection refused")
+
+
+def test_failing_postgres_write_does_not_block_solr(solr, sqlite_db, checkpoints):
+    def broken_write():
+        raise RuntimeError("postgres went away")
+
+    pg = RecordingSink(on_write=broken_write)
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    processed = main.process_tracks_range((1, 10), [pg, sink])
+    sink.close()
+
+    assert processed == 10
+    assert pg.aborted
+    assert checkpoints == [("solr:tracks", (1, 10))]
+    assert len(solr.docs) == 10
+
+
+def test_failing_begin_range_does_not_block_solr(solr, sqlite_db, checkpoints):
+    pg = RecordingSink(on_begin=postgres_down)
+    sink = main.SolrSink("tracks", solr.url, main.track_solr_doc)
+
+    main.process_tracks_range((1, 10), [pg, sink])
+    sink.close()
+
+    assert pg.rows == []
+    assert checkpoints == [("solr:tracks", (1, 10))]
+    assert len(solr.docs) == 10
+
+
+def test_no_extraction_when_every_sink_fails_to_begin(sqlite_db, checkpoints, monkeypatch):
+    def no_sqlite():
+        raise AssertionError("SQLite should not be touched")
+
+    monkeypatch.setattr(main, "sqlite_conn", no_sqlite)
+
+    assert main.process_tracks_range((1, 10), [RecordingSink(on_begin=postgres_down)]) == 0
+    assert checkpoints == []
@@ -0,0 +1,192 @@
+import os
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("tqdm")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+import main
+import snapshot
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch, sqlite_db):
+    path = tmp_path / "snapshot"
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(path))
+    monkeypatch.setattr(snapshot, "BATCH_SIZE", 4)
+    os.makedirs(path / "tracks")
+    return path
+
+
+def read_rows(table_name, rng):
+    table = pq.read_table(snapshot.partition_path(table_name, rng))
+    return [tuple(r.values()) for r in table.to_pylist()]
+
+
+def test_rows_to_batch_round_trips_nulls_and_empty():
+    schema = snapshot.TABLES["tracks"]["schema"]
+    rows = [
+        ("t1", "Song", "A", "rock", 1000, "s.jpg", "l.jpg", "p.mp3", 50),
+        ("t2", "Song", "", "", 2000, None, None, None, None),
+    ]
+
+    batch = snapshot.rows_to_batch(rows, schema)
+    assert batch.schema == schema
+    assert list(zip(*(col.to_pylist() for col in batch.columns))) == rows
+
+    empty = snapshot.rows_to_batch([], schema)
+    assert empty.num_rows == 0
+    assert empty.schema == schema
+
+
+def test_snapshot_range_matches_direct_extract(snapshot_dir):
+    rng = (1, 10)
+    assert snapshot.snapshot_range("tracks", rng) == 10
+    assert snapshot.list_partitions("tracks") == [rng]
+
+    sconn, scur = main.sqlite_conn()
+    expected = list(main.extract_tracks(scur, rng))
+    sconn.close()
+
+    rows = read_rows("tracks", rng)
+    assert sorted(rows) == sorted(expected)
+    t1 = next(r for r in rows if r[0] == "t1")
+    assert t1[5] is None and t1[6] is None and t1[8] is None  # no art, no popularity
+    t2 = next(r for r in rows if r[0] == "t2")
+    assert t2[5:7] == ("small.jpg", "large.jpg") and t2[8] == 2
+
+
+def test_snapshot_range_writes_empty_partition(snapshot_dir):
+    rng = (100, 109)
+    assert snapshot.snapshot_range("tracks", rng) == 0
+    assert snapshot.list_partitions("tracks") == [rng]
+    assert read_rows("tracks", rng) == []
+
+
+def test_failed_extract_leaves_no_partition(snapshot_dir, monkeypatch):
+    def broken_extract(scur, rng):
+        yield from main.extract_tracks(scur, rng)
+        raise RuntimeError("sqlite went away")
+
+    monkeypatch.setitem(snapshot.TABLES["tracks"], "extract", broken_extract)
+
+    rng = (1, 10)
+    snapshot.snapshot_range("tracks", rng)
+
+    assert snapshot.list_partitions("tracks") == []
+    assert os.listdir(snapshot_dir / "tracks") == []  # tmp file deleted too
+
+
+def test_extract_refuses_changed_source(snapshot_dir, sqlite_db):
+    snapshot.run_snapshot_for_table("tracks")
+    assert snapshot.list_partitions("tracks") == [(1, 10), (11, 20), (21, 25)]
+    manifest = snapshot.read_manifest("tracks")
+    assert manifest["range_size"] == 10
+    assert (manifest["row_min"], manifest["row_max"]) == (1, 25)
+
+    os.remove(snapshot.partition_path("tracks", (11, 20)))
+    with open(sqlite_db, "ab") as f:
+        f.write(b"\0")  # source changed
+
+    snapshot.run_snapshot_for_table("tracks")
+    assert snapshot.list_partitions("tracks") == [(1, 10), (21, 25)]
+    assert "sqlite_size" in snapshot.manifest_mismatch(snapshot.read_manifest("tracks"))
+
+
+def test_extract_refuses_different_range_layout(snapshot_dir, monkeypatch):
+    snapshot.run_snapshot_for_table("tracks")
+    os.remove(snapshot.partition_path("tracks", (21, 25)))
+
+    snapshot.run_snapshot_for_table("tracks", start_at=5)
+    monkeypatch.setattr(main, "RANGE_SIZE", 5)
+    snapshot.run_snapshot_for_table("tracks")
+
+    assert snapshot.list_partitions("tracks") == [(1, 10), (11, 20)]
+    assert "RANGE_SIZE" in snapshot.manifest_mismatch(snapshot.read_manifest("tracks"))
+
+
+class FakeConn:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_pg(monkeypatch):
+    """Record what the load stage inserts and checkpoints instead of talking to Postgres."""
+    loaded = {"rows": [], "marked": [], "completed": set()}
+    monkeypatch.setattr(snapshot, "pg_conn", lambda: (FakeConn(), None))
+    monkeypatch.setattr(main, "execute_values", lambda cur, sql, rows: loaded["rows"].extend(rows))
+    monkeypatch.setattr(snapshot, "mark_range_done", lambda name, rng: loaded["marked"].append((name, rng)))
+    monkeypatch.setattr(snapshot, "get_completed_ranges", lambda name: set(loaded["completed"]))
+    return loaded
+
+
+def direct_rows(rng):
+    sconn, scur = main.sqlite_conn()
+    rows = list(main.extract_tracks(scur, rng))
+    sconn.close()
+    return rows
+
+
+def test_load_streams_every_partition(snapshot_dir, fake_pg):
+    snapshot.run_snapshot_for_table("tracks")
+
+    assert snapshot.run_load_for_table("tracks") == 25
+    assert sorted(fake_pg["rows"]) == sorted(direct_rows((1, 25)))
+    assert sorted(fake_pg["marked"]) == [("tracks", (1, 10)), ("tracks", (11, 20)), ("tracks", (21, 25))]
+
+
+def test_load_skips_checkpointed_partitions(snapshot_dir, fake_pg):
+    snapshot.run_snapshot_for_table("tracks")
+    fake_pg["completed"] = {(1, 10), (21, 25)}
+
+    assert snapshot.run_load_for_table("tracks") == 10
+    assert sorted(fake_pg["rows"]) == sorted(direct_rows((11, 20)))
+    assert fake_pg["marked"] == [("tracks", (11, 20))]
+
+
+def test_load_refuses_incomplete_snapshot(snapshot_dir, fake_pg, capsys):
+    snapshot.run_snapshot_for_table("tracks")
+    os.remove(snapshot.partition_path("tracks", (11, 20)))
+
+    assert snapshot.run_load_for_table("tracks") == 0
+    assert "snapshot is incomplete" in capsys.readouterr().out
+    assert fake_pg["rows"] == [] and fake_pg["marked"] == []
+
+
+def test_load_refuses_range_size_mismatch(snapshot_dir, fake_pg, monkeypatch, capsys):
+    snapshot.run_snapshot_for_table("tracks")
+    monkeypatch.setattr(main, "RANGE_SIZE", 5)
+
+    assert snapshot.run_load_for_table("tracks") == 0
+    assert "RANGE_SIZE" in capsys.readouterr().out
+    assert fake_pg["rows"] == [] and fake_pg["marked"] == []
+
+
+def test_load_refuses_changed_source(snapshot_dir, fake_pg, sqlite_db, capsys):
+    snapshot.run_snapshot_for_table("tracks")
+    with open(sqlite_db, "ab") as f:
+        f.write(b"\0")
+
+    assert snapshot.run_load_for_table("tracks") == 0
+    assert "SQLite source changed" in capsys.readouterr().out
+    assert fake_pg["rows"] == [] and fake_pg["marked"] == []
+
+
+def test_load_without_source_database(snapshot_dir, fake_pg, sqlite_db, monkeypatch):
+    snapshot.run_snapshot_for_table("tracks")
+    expected = direct_rows((1, 25))
+    # Second environment: only the snapshot was copied over
+    monkeypatch.setattr(main, "SQLITE_DB", str(sqlite_db) + ".missing")
+
+    assert snapshot.run_load_for_table("tracks") == 25
+    assert sorted(fake_pg["rows"]) == sorted(expected)
+    assert len(fake_pg["marked"]) == 3